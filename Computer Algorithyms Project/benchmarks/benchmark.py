@@ -0,0 +1,266 @@
+import sys
+import os
+import argparse
+import json
+import platform
+import random
+import statistics
+import string
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from index.red_black_tree import RedBlackTree
+from index.b_plus_tree import BPlusTree
+from compression.huffman import HuffmanCoding
+
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+TREES = {
+    "red_black_tree": RedBlackTree,
+    "b_plus_tree": BPlusTree,
+}
+
+
+def measure(run, setup=None, repeat=5, warmup=1):
+    """Time run() with perf_counter_ns. setup() runs untimed before each call
+    and its return value is passed to run()."""
+    samples = []
+    for i in range(warmup + repeat):
+        state = setup() if setup else None
+        if setup:
+            start = time.perf_counter_ns()
+            run(state)
+        else:
+            start = time.perf_counter_ns()
+            run()
+        elapsed = time.perf_counter_ns() - start
+        if i >= warmup:
+            samples.append(elapsed)
+
+    return {
+        "repeat": repeat,
+        "warmup": warmup,
+        "min_ns": min(samples),
+        "median_ns": int(statistics.median(samples)),
+        "mean_ns": int(statistics.mean(samples)),
+        "stdev_ns": int(statistics.stdev(samples)) if len(samples) > 1 else 0,
+    }
+
+
+def synthetic_dataset(n, seed=0):
+    rng = random.Random(seed)
+    items = [(f"file_{i:08d}.txt", f"/data/{i % 1000:03d}/file_{i:08d}.txt") for i in range(n)]
+    rng.shuffle(items)
+    return items
+
+
+def path_dataset(root, limit):
+    items = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            items.append((filename, os.path.join(dirpath, filename)))
+            if len(items) >= limit:
+                return items
+    return items
+
+
+def synthetic_text(size, seed=0):
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + " \n.,"
+    # Skewed weights so the Huffman codes have different lengths
+    weights = [1 / (i + 1) for i in range(len(alphabet))]
+    return "".join(rng.choices(alphabet, weights=weights, k=size))
+
+
+def _built_tree(tree_class, items):
+    tree = tree_class()
+    for key, value in items:
+        tree.insert(key, value)
+    return tree
+
+
+def bench_tree(name, tree_class, items, repeat, warmup, seed=0):
+    rng = random.Random(seed)
+    keys = [key for key, _ in items]
+    lookups = rng.sample(keys, len(keys))
+    ordered = sorted(keys)
+    # Scan about 1% of the keys, starting from a random position
+    width = max(1, len(ordered) // 100)
+    offset = rng.randrange(max(1, len(ordered) - width))
+    range_start, range_end = ordered[offset], ordered[min(offset + width, len(ordered)) - 1]
+    tree = _built_tree(tree_class, items)
+    ops = len(items)
+
+    def insert():
+        _built_tree(tree_class, items)
+
+    def bulk_load():
+        tree_class().bulk_load(items)
+
+    def search():
+        for key in lookups:
+            tree.search(key)
+
+    def delete(target):
+        for key in lookups:
+            target.delete(key)
+
+    def range_scan():
+        tree.range_query(range_start, range_end)
+
+    def full_scan():
+        tree.range_query(ordered[0], ordered[-1])
+
+    cases = [
+        ("insert", measure(insert, repeat=repeat, warmup=warmup), ops),
+        ("bulk_load", measure(bulk_load, repeat=repeat, warmup=warmup), ops),
+        ("search", measure(search, repeat=repeat, warmup=warmup), ops),
+        ("delete", measure(delete, setup=lambda: _built_tree(tree_class, items),
+                           repeat=repeat, warmup=warmup), ops),
+        ("range_scan", measure(range_scan, repeat=repeat, warmup=warmup), width),
+        ("full_scan", measure(full_scan, repeat=repeat, warmup=warmup), ops),
+    ]
+
+    results = []
+    for op, stats, count in cases:
+        stats.update({
+            "benchmark": f"{name}.{op}",
+            "structure": name,
+            "operation": op,
+            "n": len(items),
+            "ops": count,
+            "ns_per_op": stats["median_ns"] / count if count else 0,
+        })
+        results.append(stats)
+    return results
+
+
+def bench_huffman(name, text, repeat, warmup, workdir=None):
+    huffman = HuffmanCoding()
+    original_length = len(text.encode("utf-8"))
+    size_mb = original_length / (1024 * 1024)
+    encoded = huffman.encode(text)
+    workdir = workdir or tempfile.gettempdir()
+    compressed_path = os.path.join(workdir, f"bench_{os.getpid()}.bin")
+    output_path = os.path.join(workdir, f"bench_{os.getpid()}.out")
+    huffman.write_encoded_file(encoded, compressed_path)
+    buffer = bytearray(original_length)
+
+    results = []
+    for op, run in [("encode", lambda: huffman.encode(text)),
+                    ("decode", lambda: huffman.decode(encoded)),
+                    ("decompress_into", lambda: HuffmanCoding().decompress_into(compressed_path, buffer)),
+                    ("decompress_to_file", lambda: HuffmanCoding().decompress_to_file(compressed_path, output_path))]:
+        stats = measure(run, repeat=repeat, warmup=warmup)
+        stats.update({
+            "benchmark": f"huffman.{op}",
+            "structure": "huffman",
+            "operation": op,
+            "dataset": name,
+            "n": len(text),
+            "mb_per_s": size_mb / (stats["median_ns"] / 1e9) if stats["median_ns"] else 0,
+        })
+        results.append(stats)
+
+    os.remove(compressed_path)
+    os.remove(output_path)
+    return results
+
+
+def run_benchmarks(sizes, repeat=5, warmup=1, path=None, text_size=1_000_000,
+                   text_file=None, trees=None, seed=0):
+    results = []
+    datasets = [(f"synthetic_{n}", synthetic_dataset(n, seed)) for n in sizes]
+    if path:
+        datasets.append((f"path_{os.path.basename(os.path.abspath(path))}",
+                         path_dataset(path, max(sizes))))
+
+    for dataset, items in datasets:
+        if not items:
+            continue
+        for name in trees or TREES:
+            for stats in bench_tree(name, TREES[name], items, repeat, warmup, seed):
+                stats["dataset"] = dataset
+                results.append(stats)
+
+    texts = [("synthetic_text", synthetic_text(text_size, seed))]
+    if text_file:
+        with open(text_file, 'r', encoding='utf-8') as f:
+            texts.append((os.path.basename(text_file), f.read()))
+    for name, text in texts:
+        if text:
+            results.extend(bench_huffman(name, text, repeat, warmup))
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "repeat": repeat,
+            "warmup": warmup,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def print_summary(report):
+    for r in report["results"]:
+        rate = f"{r['mb_per_s']:.2f} MB/s" if "mb_per_s" in r else f"{r['ns_per_op']:.0f} ns/op"
+        print(f"{r['benchmark']:<28} {r['dataset']:<24} median {r['median_ns'] / 1e6:10.3f} ms  {rate}")
+
+
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def _non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {number}")
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the index trees and Huffman coding.")
+    parser.add_argument("--sizes", default=",".join(str(n) for n in DEFAULT_SIZES),
+                        help="comma separated key counts, e.g. 1000,10000,10000000")
+    parser.add_argument("--repeat", type=_positive_int, default=5)
+    parser.add_argument("--warmup", type=_non_negative_int, default=1)
+    parser.add_argument("--path", help="directory to crawl for a real filename dataset")
+    parser.add_argument("--text-size", type=int, default=1_000_000,
+                        help="characters of synthetic text for the Huffman benchmark")
+    parser.add_argument("--text-file", help="text file to use as an extra Huffman dataset")
+    parser.add_argument("--trees", default=",".join(TREES), help="trees to benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        sizes=[int(n) for n in args.sizes.split(",")],
+        repeat=args.repeat,
+        warmup=args.warmup,
+        path=args.path,
+        text_size=args.text_size,
+        text_file=args.text_file,
+        trees=args.trees.split(","),
+        seed=args.seed,
+    )
+
+    print_summary(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
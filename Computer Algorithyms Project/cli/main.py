@@ -1,12 +1,19 @@
 import sys
 import os 
+import argparse
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 from index.red_black_tree import RedBlackTree
 from index.b_plus_tree import BPlusTree
-from compression.huffman import HuffmanCoding
+from index.index_sync import IndexSync
+from compression.huffman import HuffmanCoding, MissingHeaderError, decoded_path
+from benchmarks.benchmark import measure
+from instrumentation.metrics import METRICS
+
+
+LISTING_REPEAT = 21
 
 
 def clear_screen():
@@ -23,6 +30,8 @@ def print_menu():
     print("[5] Search File by Name")
     print("[6] List Indexed Files")
     print("[7] Delete File from Index")
+    print("[8] Sync Directory into Index")
+    print("[9] List Synced Files in Directory")
     print("[0] Exit")
 
 
@@ -39,12 +48,29 @@ def show_error(message):
     input("\n Press Enter to return to main menu...")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="File Compression and Indexing System")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="enable profiling and write a Prometheus-style metrics dump to PATH")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
     huffman = HuffmanCoding()
     bptree = BPlusTree()
     rbtree = RedBlackTree()
+    sync = None
+
+    if args.metrics:
+        METRICS.enable()
+        METRICS.watch("red_black_tree.height", rbtree.height)
+        METRICS.watch("bplus_tree.height", bptree.height)
+        METRICS.watch("bplus_tree.fill_factor", bptree.fill_factor)
 
     while True:
+        if args.metrics:
+            METRICS.write_prometheus(args.metrics)
         print_menu()
         choice = input("Select an option: ").strip()
 
@@ -87,7 +113,7 @@ def main():
                 encoded = "".join(huffman.codes[char] for char in text)
 
                 output_path = input("Enter output path for compressed .bin file: ").strip()
-                huffman.write_encoded_file(encoded, output_path)
+                huffman.write_encoded_file(encoded, output_path, len(text.encode('utf-8')))
 
                 show_success("File Compressed (Manual)", {
                     "Input Text": text,
@@ -103,11 +129,22 @@ def main():
                 show_error("File not found.")
                 continue
 
-            bitstring = huffman.read_encoded_file(path)
-            decoded = huffman.decode(bitstring)
-            decompressed_path = path.replace(".bin", "_decoded.txt")
-            with open(decompressed_path, 'w', encoding='utf-8') as f:
-                f.write(decoded)
+            decompressed_path = decoded_path(path)
+            try:
+                # A separate instance, so the header's tree does not replace this session's
+                HuffmanCoding().decompress_to_file(path, decompressed_path)
+            except MissingHeaderError:
+                # Older files without a header, decode with the tree from this session
+                if huffman.root is None:
+                    show_error("File has no header and no tree is loaded. Compress something first.")
+                    continue
+                bitstring = huffman.read_encoded_file(path)
+                decoded = huffman.decode(bitstring)
+                with open(decompressed_path, 'w', encoding='utf-8') as f:
+                    f.write(decoded)
+            except ValueError as e:
+                show_error(f"Decompression failed: {e}")
+                continue
 
             show_success("File Decompressed", {
                 "Decoded Output": decompressed_path
@@ -140,39 +177,39 @@ def main():
             input("\n Press Enter to return to main menu...")
 
         elif choice == "6":
-            import time
-
             print("\n Indexed Files Comparison")
 
-            
-            start_rbt = time.time()
             rbt_files = rbtree.list_files()
-            end_rbt = time.time()
-
             print("\n Red-Black Tree Files:")
             if not rbt_files:
                 print("No files indexed.")
             else:
                 for filename, path in rbt_files:
                     print(f"{filename} → {path}")
-            rbt_duration = end_rbt - start_rbt
-            print(f" RBT Listing Time: {rbt_duration:.6f} seconds")
 
-            #
-            start_bpt = time.time()
             bpt_files = bptree.range_query("", "z" * 100)
-            end_bpt = time.time()
-
             print("\n B+ Tree Files:")
             if not bpt_files:
                 print("No files indexed.")
             else:
                 for filename, path in bpt_files:
                     print(f"{filename} → {path}")
-            bpt_duration = end_bpt - start_bpt
-            print(f" BPT Listing Time: {bpt_duration:.6f} seconds")
 
-            # --- Karşılaştırma sonucu ---
+            # Median of repeated runs after a warmup, see benchmarks/benchmark.py for the full suite
+            # Keep the timing repeats out of the profiling counters
+            metrics_enabled = METRICS.enabled
+            METRICS.disable()
+            try:
+                rbt_stats = measure(rbtree.list_files, repeat=LISTING_REPEAT)
+                bpt_stats = measure(lambda: bptree.range_query("", "z" * 100), repeat=LISTING_REPEAT)
+            finally:
+                if metrics_enabled:
+                    METRICS.enable()
+            rbt_duration = rbt_stats["median_ns"]
+            bpt_duration = bpt_stats["median_ns"]
+            print(f"\n RBT Listing Time: {rbt_duration / 1e3:.3f} µs (median of {LISTING_REPEAT})")
+            print(f" BPT Listing Time: {bpt_duration / 1e3:.3f} µs (median of {LISTING_REPEAT})")
+
             print("\n Comparison Result:")
             if rbt_duration < bpt_duration:
                 print(" Red-Black Tree was faster.")
@@ -192,7 +229,45 @@ def main():
                 " Deleted": filename
             })
 
+        elif choice == "8":
+            root = input("Enter directory to keep in sync: ").strip()
+            if not os.path.isdir(root):
+                show_error("Directory not found.")
+                continue
+
+            if sync:
+                sync.stop()
+            sync = IndexSync(root)
+            sync.start()
+
+            show_success("Directory Synced", {
+                "Directory": sync.root,
+                "Files Indexed": sync.file_count,
+                "Watch Mode": sync.mode
+            })
+
+        elif choice == "9":
+            if not sync:
+                show_error("No directory is being synced. Use option 8 first.")
+                continue
+
+            directory = input("Enter directory to list: ").strip() or sync.root
+            files = sync.list_dir(directory)
+
+            print(f"\n Synced Files under {directory}:")
+            if not files:
+                print("No files indexed.")
+            else:
+                for path, (size, _) in files:
+                    print(f"{path} ({size} bytes)")
+
+            input("\n Press Enter to return to main menu...")
+
         elif choice == "0":
+            if sync:
+                sync.stop()
+            if args.metrics:
+                METRICS.write_prometheus(args.metrics)
             print("\n Exiting... Goodbye!")
             break
 
@@ -0,0 +1,112 @@
+import os
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+from compression.huffman import HuffmanCoding, decoded_path
+
+
+def _compress(input_path, output_path):
+    # Runs in a worker process, so file I/O and encoding never touch the event loop
+    with open(input_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    huffman = HuffmanCoding()
+    encoded = huffman.encode(text)
+    huffman.write_encoded_file(encoded, output_path)
+    return huffman.frequencies
+
+
+def _decompress(input_path, output_path, frequencies):
+    huffman = HuffmanCoding()
+    if frequencies is None:
+        huffman.decompress_to_file(input_path, output_path)
+        return
+
+    # Older files without a header need the frequencies from compress_file
+    huffman.build_tree(frequencies)
+    decoded = huffman.decode(huffman.read_encoded_file(input_path))
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(decoded)
+
+
+class AsyncCompressor:
+    """Asyncio facade for HuffmanCoding.
+
+    Work runs in a process pool. A semaphore caps how many jobs are in flight,
+    so extra callers wait their turn (in arrival order) instead of piling up
+    on the pool's queue."""
+    def __init__(self, max_workers=None, max_concurrency=None, executor=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_concurrency = max_concurrency or self.max_workers
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._semaphore = None
+        self._loop = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _get_semaphore(self):
+        # Semaphores belong to one event loop, make a fresh one if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _run(self, func, *args):
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+
+    async def compress_file(self, input_path, output_path=None):
+        """Compress a text file. Returns its character frequencies."""
+        output_path = output_path or input_path + ".bin"
+        return await self._run(_compress, input_path, output_path)
+
+    async def decompress_file(self, input_path, frequencies=None, output_path=None):
+        """Decompress a .bin file into a memory-mapped output. Returns the output path.
+        frequencies is only needed for older files written without a header."""
+        output_path = output_path or decoded_path(input_path)
+        await self._run(_decompress, input_path, output_path, frequencies)
+        return output_path
+
+    def close(self, wait=True):
+        """Shut down the pool. With wait=False jobs in flight still finish, but nothing blocks."""
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+
+_default = None
+
+
+def configure(max_workers=None, max_concurrency=None, executor=None):
+    """Replace the compressor used by the module-level functions"""
+    global _default
+    if _default is not None:
+        # Called from the event loop, so don't wait for the old pool's jobs here
+        _default.close(wait=False)
+    _default = AsyncCompressor(max_workers, max_concurrency, executor)
+    return _default
+
+
+def _get_default():
+    return _default or configure()
+
+
+async def compress_file(input_path, output_path=None):
+    return await _get_default().compress_file(input_path, output_path)
+
+
+async def decompress_file(input_path, frequencies=None, output_path=None):
+    return await _get_default().decompress_file(input_path, frequencies, output_path)
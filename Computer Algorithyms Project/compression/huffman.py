@@ -1,6 +1,34 @@
+import os
 import heapq
+import mmap
+import struct
+import tempfile
 from collections import defaultdict
 
+from instrumentation.metrics import timed
+
+# File layout: header, one SYMBOL entry per character in frequency order, then the packed bits
+MAGIC = b"HUF1"
+HEADER = struct.Struct("<4sQQI")  # magic, original UTF-8 length, encoded bit length, symbol count
+SYMBOL = struct.Struct("<IQ")  # code point, frequency
+DECODE_BLOCK = 1 << 16
+
+
+class MissingHeaderError(ValueError):
+    """Raised for older .bin files written without a header"""
+
+
+def _current_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def decoded_path(path):
+    """Default output path for decompressing path, e.g. notes.bin -> notes_decoded.txt"""
+    return os.path.splitext(path)[0] + "_decoded.txt"
+
+
 class HuffmanNode:
     def __init__(self, char, freq):
         self.char = char
@@ -15,7 +43,9 @@ class HuffmanCoding:
     def __init__(self):
         self.codes = {}
         self.root = None
+        self.frequencies = {}
 
+    @timed("huffman.calc_freq")
     def calc_freq(self,text):
         frequencies = defaultdict(int)
 
@@ -24,7 +54,9 @@ class HuffmanCoding:
 
         return dict(frequencies)
     
+    @timed("huffman.build_tree")
     def build_tree(self, frequencies):
+        self.frequencies = frequencies
         heap = [HuffmanNode(char,freq) for char, freq in frequencies.items()]
         heapq.heapify(heap)
 
@@ -38,16 +70,21 @@ class HuffmanCoding:
 
         self.root = heap[0]
 
+    @timed("huffman.gen_codes")
     def gen_codes(self, node=None, current_code=""):
         if node is None:
             node = self.root
+        self._gen_codes(node, current_code)
+
+    def _gen_codes(self, node, current_code):
         if node.char is not None:
             self.codes[node.char] = current_code
             return
-        self.gen_codes(node.left, current_code + "0")
-        self.gen_codes(node.right, current_code + "1")
+        self._gen_codes(node.left, current_code + "0")
+        self._gen_codes(node.right, current_code + "1")
 
 
+    @timed("huffman.encode")
     def encode(self, text):
         if not text:
             raise ValueError("Input text is empty. Cannot encode.")
@@ -56,6 +93,7 @@ class HuffmanCoding:
         self.gen_codes()
         return "".join(self.codes[char] for char in text)
     
+    @timed("huffman.decode")
     def decode(self, encoded_text):
         decoded = ""
         current = self.root
@@ -66,9 +104,18 @@ class HuffmanCoding:
                 current = self.root
 
         return decoded
-    def write_encoded_file(self, encoded_text, output_path):
+
+    @timed("huffman.write_encoded_file")
+    def write_encoded_file(self, encoded_text, output_path, original_length=None):
+        # original_length is the UTF-8 size of the text, by default derived from the frequencies
+        if original_length is None:
+            original_length = sum(len(char.encode('utf-8')) * freq for char, freq in self.frequencies.items())
+
         padded_encoded = encoded_text + '0' *((8 - len(encoded_text) % 8) % 8)
         byte_array = bytearray()
+        byte_array += HEADER.pack(MAGIC, original_length, len(encoded_text), len(self.frequencies))
+        for char, freq in self.frequencies.items():
+            byte_array += SYMBOL.pack(ord(char), freq)
         for i in range(0, len(padded_encoded), 8):
             byte = padded_encoded[i:i+8]
             byte_array.append(int(byte, 2))
@@ -76,17 +123,144 @@ class HuffmanCoding:
         with open(output_path, 'wb') as f:
             f.write(byte_array)
 
+    def _read_header(self, data):
+        # Returns (original_length, bit_length, payload offset), or None for files without a header
+        if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+            return None
+        _, original_length, bit_length, symbols = HEADER.unpack_from(data, 0)
+        if len(data) < HEADER.size + symbols * SYMBOL.size:
+            raise ValueError("Compressed file header is truncated.")
+        if symbols == 0 and original_length > 0:
+            raise ValueError("Compressed file header has no symbols for non-empty data.")
 
+        offset = HEADER.size
+        frequencies = {}
+        for _ in range(symbols):
+            codepoint, freq = SYMBOL.unpack_from(data, offset)
+            frequencies[chr(codepoint)] = freq
+            offset += SYMBOL.size
+        if frequencies:
+            self.build_tree(frequencies)
+        return original_length, bit_length, offset
+
+    @timed("huffman.read_encoded_file")
     def read_encoded_file(self, input_path):
         with open(input_path, 'rb') as f:
             bytes_data = f.read()
 
-        bit_string = ""
-        for byte in bytes_data:
-            bits = bin(byte)[2:].rjust(8, '0')
-            bit_string += bits
+        header = self._read_header(bytes_data)
+        offset = header[2] if header else 0
+        bit_string = "".join(format(byte, '08b') for byte in bytes_data[offset:])
 
-        return bit_string
-    
+        # Drop the padding bits when the header tells us the real length
+        return bit_string[:header[1]] if header else bit_string
+
+    def _require_header(self, data):
+        header = self._read_header(data)
+        if header is None:
+            raise MissingHeaderError("Compressed file has no header. Use read_encoded_file and decode.")
+        return header[0], header[2]
+
+    def _map_input(self, f):
+        # mmap refuses empty files, and an empty file cannot hold a header either
+        if os.fstat(f.fileno()).st_size == 0:
+            raise MissingHeaderError("Compressed file has no header. Use read_encoded_file and decode.")
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @timed("huffman.decompress_into")
+    def decompress_into(self, input_path, buffer):
+        """Decode a compressed file straight into a writable buffer as UTF-8 bytes.
+        The buffer must hold at least the original length; returns the bytes written."""
+        with open(input_path, 'rb') as f, self._map_input(f) as data:
+            original_length, offset = self._require_header(data)
+            if len(buffer) < original_length:
+                raise ValueError(f"Buffer holds {len(buffer)} bytes, {original_length} needed.")
+            # Every view of the mmap is released explicitly, or closing it fails with BufferError
+            with memoryview(data) as view, view[offset:] as payload, memoryview(buffer) as output:
+                self._decode_bytes(payload, output, original_length)
+        return original_length
+
+    @timed("huffman.decompress_to_file")
+    def decompress_to_file(self, input_path, output_path):
+        """Decode a compressed file into a memory-mapped output file of the original size.
+        The output is written to a temporary file and only moved into place on success."""
+        if os.path.realpath(input_path) == os.path.realpath(output_path) or (
+                os.path.exists(output_path) and os.path.samefile(input_path, output_path)):
+            raise ValueError("Output path is the compressed input file.")
+
+        with open(input_path, 'rb') as f, self._map_input(f) as data:
+            original_length, offset = self._require_header(data)
+            tmp_path = None
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_path) or ".", suffix=".tmp")
+                with open(fd, 'w+b') as out:
+                    # mkstemp creates the file private, give it the usual permissions
+                    os.fchmod(out.fileno(), 0o666 & ~_current_umask())
+                    out.truncate(original_length)
+                    if original_length:
+                        with mmap.mmap(out.fileno(), original_length) as output:
+                            with memoryview(data) as view, view[offset:] as payload, \
+                                    memoryview(output) as target:
+                                self._decode_bytes(payload, target, original_length)
+                            output.flush()
+                os.replace(tmp_path, output_path)
+            except BaseException:
+                if tmp_path is not None:
+                    os.remove(tmp_path)
+                raise
+        return original_length
+
+    def _decode_bytes(self, payload, output, length):
+        if length == 0:
+            return
+        if self.root.char is not None:
+            # Single distinct character, its code is empty so fill the output directly
+            unit = self.root.char.encode('utf-8')
+            chunk = unit * max(1, (1 << 16) // len(unit))
+            for pos in range(0, length, len(chunk)):
+                end = min(pos + len(chunk), length)
+                output[pos:end] = chunk[:end - pos]
+            return
+
+        # Byte-at-a-time decoding: for each (tree position, input byte) the table holds
+        # the position reached and the UTF-8 bytes emitted. Entries are filled on first use.
+        # Output is staged per input block in one reused bytearray, then copied into place.
+        states = {id(self.root): 0}
+        nodes = [self.root]
+        table = [None] * 256
+        staged = bytearray()
+        pos = 0
+        state = 0
+        for start in range(0, len(payload), DECODE_BLOCK):
+            with payload[start:start + DECODE_BLOCK] as block:
+                for byte in block:
+                    entry = table[state + byte]
+                    if entry is None:
+                        entry = table[state + byte] = self._walk_byte(nodes[state >> 8], byte, states, nodes, table)
+                    state, emitted = entry
+                    staged += emitted
+
+            # Anything past the original length is padding
+            end = min(pos + len(staged), length)
+            with memoryview(staged) as chunk, chunk[:end - pos] as part:
+                output[pos:end] = part
+            staged.clear()
+            pos = end
+            if pos == length:
+                return
 
+        raise ValueError("Compressed data ended before the original length was reached.")
 
+    def _walk_byte(self, node, byte, states, nodes, table):
+        chars = []
+        for shift in range(7, -1, -1):
+            node = node.right if (byte >> shift) & 1 else node.left
+            if node.char is not None:
+                chars.append(node.char)
+                node = self.root
+        state = states.get(id(node))
+        if state is None:
+            state = states[id(node)] = len(nodes) << 8
+            nodes.append(node)
+            table.extend([None] * 256)
+        return state, "".join(chars).encode('utf-8')
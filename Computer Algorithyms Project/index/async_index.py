@@ -0,0 +1,53 @@
+import asyncio
+import threading
+
+from index.b_plus_tree import BPlusTree
+
+
+class AsyncIndex:
+    """Asyncio facade for an index tree.
+
+    Queries run in a thread pool under the tree's lock, so a long range scan or
+    a sync batch holding the lock never blocks the event loop. Pass the lock of
+    an IndexSync when wrapping one of its trees."""
+    def __init__(self, tree, lock=None, executor=None, max_concurrency=4):
+        self.tree = tree
+        self.lock = lock or threading.RLock()
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._loop = None
+
+    def _locked(self, func, *args):
+        with self.lock:
+            return func(*args)
+
+    def _get_semaphore(self):
+        # Semaphores belong to one event loop, make a fresh one if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _run(self, func, *args):
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self._locked, func, *args)
+
+    async def search(self, key):
+        return await self._run(self.tree.search, key)
+
+    async def range_query(self, start, end):
+        return await self._run(self.tree.range_query, start, end)
+
+    async def list_files(self):
+        if isinstance(self.tree, BPlusTree):
+            return await self._run(self.tree.range_query, "", "\U0010ffff")
+        return await self._run(self.tree.list_files)
+
+    async def insert(self, key, value):
+        await self._run(self.tree.insert, key, value)
+
+    async def delete(self, key):
+        await self._run(self.tree.delete, key)
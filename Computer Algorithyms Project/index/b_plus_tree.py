@@ -1,5 +1,7 @@
 import bisect
 
+from instrumentation.metrics import METRICS
+
 class BPlusTreeNode:
     def __init__(self, is_leaf=False):
         self.keys = []
@@ -24,29 +26,33 @@ class BPlusTree:
         self._insert_non_full(self.root, key, value)
 
     def _insert_non_full(self, node, key, value):
+        if METRICS.enabled:
+            METRICS.count("bplus_tree.node_visits")
         if node.is_leaf:
             idx = bisect.bisect_left(node.keys, key)
             node.keys.insert(idx, key)
             node.children.insert(idx, value)
         else:
-            idx = bisect.bisect_left(node.keys, key)
+            idx = bisect.bisect_right(node.keys, key)
             child = node.children[idx]
             if len(child.keys) == self.max_keys:
                 self._split_child(node, idx)
-                if key > node.keys[idx]:
+                if key >= node.keys[idx]:
                     child = node.children[idx + 1]
             self._insert_non_full(child, key, value)
 
     def _split_child(self, parent, index):
+        if METRICS.enabled:
+            METRICS.count("bplus_tree.splits")
         old_node = parent.children[index]
         new_node = BPlusTreeNode(is_leaf=old_node.is_leaf)
         
         split_pos = len(old_node.keys) // 2
         split_key = old_node.keys[split_pos]
         
-        # Right half goes to new node
-        new_node.keys = old_node.keys[split_pos + (1 if old_node.is_leaf else 0):]
-        new_node.children = old_node.children[split_pos + (1 if old_node.is_leaf else 0):]
+        # Right half goes to new node (leaves keep the split key as their first key)
+        new_node.keys = old_node.keys[split_pos + (0 if old_node.is_leaf else 1):]
+        new_node.children = old_node.children[split_pos + (0 if old_node.is_leaf else 1):]
         
         # Left half remains
         old_node.keys = old_node.keys[:split_pos]
@@ -61,31 +67,77 @@ class BPlusTree:
             new_node.next_leaf = old_node.next_leaf
             old_node.next_leaf = new_node
 
+    def bulk_load(self, items):
+        # Build the tree bottom-up from (key, value) pairs instead of inserting one by one
+        items = sorted(items, key=lambda item: item[0])
+        self.root = BPlusTreeNode(is_leaf=True)
+        if not items:
+            return
+
+        leaves = []
+        for chunk in self._chunk(items, self.max_keys, self.min_keys):
+            leaf = BPlusTreeNode(is_leaf=True)
+            leaf.keys = [key for key, _ in chunk]
+            leaf.children = [value for _, value in chunk]
+            if leaves:
+                leaves[-1].next_leaf = leaf
+            leaves.append(leaf)
+
+        # Each level is a list of (smallest key in subtree, node)
+        level = [(leaf.keys[0], leaf) for leaf in leaves]
+        while len(level) > 1:
+            parents = []
+            for chunk in self._chunk(level, self.max_keys + 1, self.min_keys + 1):
+                node = BPlusTreeNode()
+                node.keys = [first_key for first_key, _ in chunk[1:]]
+                node.children = [child for _, child in chunk]
+                for child in node.children:
+                    child.parent = node
+                parents.append((chunk[0][0], node))
+            level = parents
+        self.root = level[0][1]
+
+    def _chunk(self, items, size, min_size):
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        # Rebalance the last two chunks so no node is left underfull
+        if len(chunks) > 1 and len(chunks[-1]) < min_size:
+            merged = chunks[-2] + chunks[-1]
+            half = len(merged) // 2
+            chunks[-2:] = [merged[:half], merged[half:]]
+        return chunks
+
     def search(self, key):
-        node = self.root
-        while not node.is_leaf:
-            idx = bisect.bisect_left(node.keys, key)
-            node = node.children[idx]
+        node = self._find_leaf(key)
         idx = bisect.bisect_left(node.keys, key)
         return node.children[idx] if idx < len(node.keys) and node.keys[idx] == key else None
 
     def range_query(self, start, end):
         results = []
         leaf = self._find_leaf(start)
+        leaves = 0
         while leaf:
+            leaves += 1
             for i, key in enumerate(leaf.keys):
                 if start <= key <= end:
                     results.append((key, leaf.children[i]))
                 elif key > end:
+                    if METRICS.enabled:
+                        METRICS.count("bplus_tree.leaf_scans", leaves)
                     return results
             leaf = leaf.next_leaf
+        if METRICS.enabled:
+            METRICS.count("bplus_tree.leaf_scans", leaves)
         return results
 
     def _find_leaf(self, key):
         node = self.root
+        visits = 1
         while not node.is_leaf:
-            idx = bisect.bisect_left(node.keys, key)
+            idx = bisect.bisect_right(node.keys, key)
             node = node.children[idx]
+            visits += 1
+        if METRICS.enabled:
+            METRICS.count("bplus_tree.node_visits", visits)
         return node
 
     def delete(self, key):
@@ -94,6 +146,8 @@ class BPlusTree:
             self.root = self.root.children[0]
 
     def _delete_recursive(self, node, key):
+        if METRICS.enabled:
+            METRICS.count("bplus_tree.node_visits")
         if node.is_leaf:
             idx = bisect.bisect_left(node.keys, key)
             if idx < len(node.keys) and node.keys[idx] == key:
@@ -101,7 +155,7 @@ class BPlusTree:
                 node.children.pop(idx)
             return
         
-        idx = bisect.bisect_left(node.keys, key)
+        idx = bisect.bisect_right(node.keys, key)
         child = node.children[idx]
         self._delete_recursive(child, key)
         
@@ -124,6 +178,8 @@ class BPlusTree:
                 self._merge_nodes(parent, index)
 
     def _borrow_from_left(self, parent, index):
+        if METRICS.enabled:
+            METRICS.count("bplus_tree.borrows")
         child = parent.children[index]
         left_sibling = parent.children[index-1]
         
@@ -143,6 +199,8 @@ class BPlusTree:
             parent.keys[index-1] = left_sibling.keys.pop()
 
     def _borrow_from_right(self, parent, index):
+        if METRICS.enabled:
+            METRICS.count("bplus_tree.borrows")
         child = parent.children[index]
         right_sibling = parent.children[index+1]
         
@@ -162,11 +220,14 @@ class BPlusTree:
             parent.keys[index] = right_sibling.keys.pop(0)
 
     def _merge_nodes(self, parent, index):
+        if METRICS.enabled:
+            METRICS.count("bplus_tree.merges")
         left = parent.children[index]
         right = parent.children[index+1]
         
         if left.is_leaf:
             # Merge leaves
+            parent.keys.pop(index)
             left.keys += right.keys
             left.children += right.children
             left.next_leaf = right.next_leaf
@@ -178,6 +239,26 @@ class BPlusTree:
         
         parent.children.pop(index+1)
 
+    def height(self):
+        height = 1
+        node = self.root
+        while not node.is_leaf:
+            node = node.children[0]
+            height += 1
+        return height
+
+    def fill_factor(self):
+        # Share of key slots in use across all nodes
+        nodes, keys = 0, 0
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            nodes += 1
+            keys += len(node.keys)
+            if not node.is_leaf:
+                stack.extend(node.children)
+        return keys / (nodes * self.max_keys)
+
     def display(self, node=None, level=0):
         if node is None:
             node = self.root
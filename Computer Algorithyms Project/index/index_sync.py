@@ -0,0 +1,355 @@
+import os
+import sys
+import errno
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from index.b_plus_tree import BPlusTree
+from instrumentation.metrics import METRICS, timed
+
+
+def scan_dir(path):
+    """Read one directory level. Returns ({filename: (size, mtime_ns)}, {subdir names}),
+    or None if the directory can no longer be read."""
+    files = {}
+    subdirs = set()
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.add(entry.name)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    # Removed between listing and stat
+                    continue
+    except OSError:
+        return None
+    return files, subdirs
+
+
+@timed("index_sync.crawl")
+def crawl(root, workers=8):
+    """Scan a whole directory tree with a pool of scandir workers.
+    Returns {directory: (files, subdirs)} in the format of scan_dir."""
+    dirs = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(scan_dir, root): root}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                result = future.result()
+                if result is None:
+                    continue
+                dirs[path] = result
+                for name in result[1]:
+                    child = os.path.join(path, name)
+                    pending[pool.submit(scan_dir, child)] = child
+    return dirs
+
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """Minimal Linux inotify binding over ctypes that reports which directories changed"""
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}  # watch descriptor -> directory
+        self.watched = set()
+
+    @staticmethod
+    def available():
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"))
+        except OSError:
+            return False
+        return hasattr(libc, "inotify_init1")
+
+    def add_watch(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        # Watching a renamed directory again hands back its existing descriptor
+        self.watched.discard(self.watches.get(wd))
+        self.watches[wd] = path
+        self.watched.add(path)
+
+    def read(self, timeout):
+        """Wait up to timeout seconds. Returns the set of changed directories,
+        or None if the kernel queue overflowed and events were lost."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return set()
+
+        dirty = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            path = self.watches.get(wd)
+            if path is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                self.watched.discard(path)
+            dirty.add(path)
+        return dirty
+
+    def close(self):
+        os.close(self.fd)
+
+
+class IndexSync:
+    """Keeps index trees in sync with a directory tree on disk.
+
+    Trees are keyed by full file path with (size, mtime_ns) as the value.
+    The first sync bulk-loads the trees from a parallel crawl, after that only
+    changed files are applied, in sorted batches."""
+    def __init__(self, root, trees=None, workers=8, interval=5.0, full_rescan_interval=300.0,
+                 batch_size=10000, use_inotify=True):
+        self.root = os.path.abspath(root)
+        self.trees = trees if trees is not None else [BPlusTree()]
+        self.workers = workers
+        self.interval = interval
+        self.full_rescan_interval = full_rescan_interval
+        self.batch_size = batch_size
+        self.use_inotify = use_inotify
+        self.dirs = {}  # directory -> (files, subdirs), the last state applied to the trees
+        self.file_count = 0
+        self.pending = {}  # path -> (was indexed, new value or None for deleted)
+        self.lock = threading.RLock()
+        self.inotify = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def mode(self):
+        return "inotify" if self.inotify else "polling"
+
+    def initial_sync(self):
+        dirs = crawl(self.root, self.workers)
+        items = [
+            (os.path.join(path, name), stat)
+            for path, (files, _) in dirs.items()
+            for name, stat in files.items()
+        ]
+        with self.lock:
+            for tree in self.trees:
+                tree.bulk_load(items)
+            self.dirs = dirs
+            self.file_count = len(items)
+            self.pending.clear()
+        if METRICS.enabled:
+            METRICS.count("index_sync.added", len(items))
+
+    def rescan(self):
+        """Full rescan of the tree, comparing mtime and size against the last state"""
+        dirs = crawl(self.root, self.workers)
+        for path in set(self.dirs) | set(dirs):
+            self._diff_files(path, dirs.get(path))
+        for path in dirs:
+            self._watch(path)
+        self.dirs = dirs
+        self.flush()
+
+    def rescan_dir(self, path):
+        """Rescan a single directory reported as changed"""
+        result = scan_dir(path)
+        old = self.dirs.get(path)
+        if result is None:
+            if old is not None:
+                self._remove_subtree(path)
+            return
+
+        if old is None and path != self.root:
+            # Directory we have not seen yet, pick up everything below it
+            self._add_subtree(path)
+            return
+
+        self._diff_files(path, result)
+        old_subdirs = old[1] if old else set()
+        for name in old_subdirs - result[1]:
+            self._remove_subtree(os.path.join(path, name))
+        for name in result[1] - old_subdirs:
+            self._add_subtree(os.path.join(path, name))
+        self.dirs[path] = result
+
+    def _add_subtree(self, path):
+        dirs = crawl(path, self.workers)
+        for subdir, state in dirs.items():
+            self._diff_files(subdir, state)
+            self.dirs[subdir] = state
+        if self.inotify is not None:
+            for subdir in dirs:
+                self._watch(subdir)
+            # Pick up anything created between the crawl and the watches being added
+            for subdir in dirs:
+                self.rescan_dir(subdir)
+
+    def _remove_subtree(self, path):
+        prefix = path + os.sep
+        for subdir in [d for d in self.dirs if d == path or d.startswith(prefix)]:
+            self._diff_files(subdir, None)
+            del self.dirs[subdir]
+
+    def _diff_files(self, path, new_state):
+        old_files = self.dirs[path][0] if path in self.dirs else {}
+        new_files = new_state[0] if new_state else {}
+        for name, stat in new_files.items():
+            old_stat = old_files.get(name)
+            if old_stat != stat:
+                self._queue(os.path.join(path, name), old_stat is not None, stat)
+        for name in old_files.keys() - new_files.keys():
+            self._queue(os.path.join(path, name), True, None)
+
+    def _queue(self, path, was_indexed, value):
+        previous = self.pending.get(path)
+        if previous is not None:
+            was_indexed = previous[0]
+        self.pending[path] = (was_indexed, value)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Apply queued changes to the trees in key order"""
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, {}
+        added = modified = deleted = 0
+        with self.lock:
+            for path in sorted(batch):
+                was_indexed, value = batch[path]
+                if was_indexed:
+                    for tree in self.trees:
+                        tree.delete(path)
+                if value is not None:
+                    for tree in self.trees:
+                        tree.insert(path, value)
+                if was_indexed and value is not None:
+                    modified += 1
+                elif was_indexed:
+                    deleted += 1
+                elif value is not None:
+                    added += 1
+            self.file_count += added - deleted
+        if METRICS.enabled:
+            METRICS.count("index_sync.added", added)
+            METRICS.count("index_sync.modified", modified)
+            METRICS.count("index_sync.deleted", deleted)
+            METRICS.count("index_sync.batches")
+
+    def _watch(self, path):
+        if self.inotify is None or path in self.inotify.watched:
+            return
+        try:
+            self.inotify.add_watch(path)
+        except OSError as e:
+            if e.errno not in (errno.ENOSPC, errno.ENOMEM):
+                # Directory vanished or is unreadable, the parent's rescan picks that up
+                return
+            # Out of watches (fs.inotify.max_user_watches), poll instead
+            self.inotify.close()
+            self.inotify = None
+
+    def search(self, path):
+        with self.lock:
+            return self.trees[0].search(os.path.abspath(path))
+
+    def list_dir(self, path):
+        """All indexed files below a directory, in path order"""
+        prefix = os.path.join(os.path.abspath(path), "")
+        with self.lock:
+            tree = self.trees[0]
+            if isinstance(tree, BPlusTree):
+                return tree.range_query(prefix, prefix + "\U0010ffff")
+            return [(key, value) for key, value in tree.list_files() if key.startswith(prefix)]
+
+    def start(self):
+        """Initial sync, then keep watching in a background thread"""
+        if self.use_inotify and Inotify.available():
+            try:
+                self.inotify = Inotify()
+            except OSError:
+                self.inotify = None
+        self.initial_sync()
+        if self.inotify is not None:
+            for path in list(self.dirs):
+                self._watch(path)
+            # Pick up anything that changed while the crawl ran, before the watches existed
+            for path in list(self.dirs):
+                self.rescan_dir(path)
+            self.flush()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="index-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+
+    def _rescan_interval(self):
+        # With inotify the periodic rescan is only a safety net for missed events
+        return self.full_rescan_interval if self.inotify is not None else self.interval
+
+    def _run(self):
+        next_rescan = time.monotonic() + self._rescan_interval()
+        while not self._stop.is_set():
+            if self.inotify is not None:
+                dirty = self.inotify.read(min(self.interval, max(0.0, next_rescan - time.monotonic())))
+                if dirty is None:
+                    next_rescan = 0.0
+                else:
+                    for path in sorted(dirty):
+                        self.rescan_dir(path)
+                    self.flush()
+            else:
+                self._stop.wait(max(0.0, next_rescan - time.monotonic()))
+
+            if self._stop.is_set():
+                break
+            if self.inotify is None and next_rescan > time.monotonic() + self.interval:
+                # Fell back to polling, don't wait out the inotify safety interval
+                next_rescan = time.monotonic() + self.interval
+            if time.monotonic() >= next_rescan:
+                self.rescan()
+                next_rescan = time.monotonic() + self._rescan_interval()
@@ -1,4 +1,6 @@
 
+from instrumentation.metrics import METRICS
+
 RED = 'RED'
 BLACK = 'BLACK'
 
@@ -26,15 +28,18 @@ class RedBlackTree:
         
         parent = None
         current = self.root
-        
+        visits = 0
         
         while current != self.NIL:
             parent = current
+            visits += 1
             if filename < current.filename:
                 current = current.left
             else:
                 current = current.right
         
+        if METRICS.enabled:
+            METRICS.count("red_black_tree.node_visits", visits)
         new_node.parent = parent
         
         if parent is None:
@@ -47,6 +52,31 @@ class RedBlackTree:
         
         self._fix_insert(new_node)
     
+    def bulk_load(self, files):
+        """Build a balanced tree from (filename, filepath) pairs in one pass"""
+        files = sorted(files, key=lambda item: item[0])
+        self.root = self.NIL
+        if not files:
+            return
+
+        # Nodes on the deepest level are red, everything above is black
+        red_depth = len(files).bit_length() - 1
+        self.root = self._build_balanced(files, 0, len(files) - 1, 0, red_depth, None)
+        self.root.color = BLACK
+
+    def _build_balanced(self, files, low, high, depth, red_depth, parent):
+        """Recursive helper for bulk_load"""
+        if low > high:
+            return self.NIL
+
+        mid = (low + high) // 2
+        filename, filepath = files[mid]
+        node = RBNode(filename, filepath, RED if depth == red_depth else BLACK)
+        node.parent = parent
+        node.left = self._build_balanced(files, low, mid - 1, depth + 1, red_depth, node)
+        node.right = self._build_balanced(files, mid + 1, high, depth + 1, red_depth, node)
+        return node
+
     def _fix_insert(self, node):
         """Maintain Red-Black Tree properties after insertion"""
         while node != self.root and node.parent.color == RED:
@@ -87,6 +117,8 @@ class RedBlackTree:
     
     def _left_rotate(self, x):
         """Left rotation operation"""
+        if METRICS.enabled:
+            METRICS.count("red_black_tree.rotations")
         y = x.right
         x.right = y.left
         if y.left != self.NIL:
@@ -105,6 +137,8 @@ class RedBlackTree:
     
     def _right_rotate(self, y):
         """Right rotation operation"""
+        if METRICS.enabled:
+            METRICS.count("red_black_tree.rotations")
         x = y.left
         y.left = x.right
         if x.right != self.NIL:
@@ -127,6 +161,8 @@ class RedBlackTree:
     
     def _search_helper(self, node, filename):
         """Recursive search helper"""
+        if METRICS.enabled:
+            METRICS.count("red_black_tree.node_visits")
         if node == self.NIL:
             return None
         
@@ -143,6 +179,26 @@ class RedBlackTree:
         self._inorder_traversal(self.root, files)
         return files
     
+    def range_query(self, start, end):
+        """List files with start <= filename <= end in alphabetical order"""
+        files = []
+        self._range_traversal(self.root, start, end, files)
+        return files
+
+    def _range_traversal(self, node, start, end, result):
+        """In-order traversal that skips subtrees outside [start, end]"""
+        if METRICS.enabled:
+            METRICS.count("red_black_tree.node_visits")
+        if node == self.NIL:
+            return
+        # Equal filenames can sit on either side after rotations, so compare inclusively
+        if start <= node.filename:
+            self._range_traversal(node.left, start, end, result)
+        if start <= node.filename <= end:
+            result.append((node.filename, node.filepath))
+        if node.filename <= end:
+            self._range_traversal(node.right, start, end, result)
+
     def _inorder_traversal(self, node, result):
         """In-order traversal helper"""
         if node != self.NIL:
@@ -185,15 +241,28 @@ class RedBlackTree:
     def _find_node(self, filename):
         """Find a node by filename"""
         current = self.root
+        visits = 0
         while current != self.NIL:
+            visits += 1
             if filename == current.filename:
-                return current
+                break
             elif filename < current.filename:
                 current = current.left
             else:
                 current = current.right
-        return self.NIL
+        if METRICS.enabled:
+            METRICS.count("red_black_tree.node_visits", visits)
+        return current
     
+    def height(self):
+        """Longest root-to-leaf path, counted in nodes"""
+        height = 0
+        level = [self.root] if self.root != self.NIL else []
+        while level:
+            height += 1
+            level = [child for node in level for child in (node.left, node.right) if child != self.NIL]
+        return height
+
     def _minimum(self, node):
         """Find minimum node in subtree"""
         while node.left != self.NIL:
@@ -0,0 +1,115 @@
+import os
+import time
+import functools
+
+
+class Metrics:
+    """Opt-in counters, phase timers and gauges. Everything is a no-op until enable() is called."""
+    def __init__(self, prefix="fcis"):
+        self.prefix = prefix
+        self.enabled = False
+        self.counters = {}
+        self.timers = {}  # name -> [calls, total_ns, max_ns]
+        self.gauges = {}
+        self.watched = {}  # name -> callable, evaluated when a snapshot is taken
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.counters.clear()
+        self.timers.clear()
+        self.gauges.clear()
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def watch(self, name, func):
+        """Register a gauge computed on demand, e.g. a tree's height"""
+        self.watched[name] = func
+
+    def record_time(self, name, elapsed_ns):
+        timer = self.timers.get(name)
+        if timer is None:
+            self.timers[name] = [1, elapsed_ns, elapsed_ns]
+        else:
+            timer[0] += 1
+            timer[1] += elapsed_ns
+            if elapsed_ns > timer[2]:
+                timer[2] = elapsed_ns
+
+    def timed(self, name):
+        """Decorator that records calls and wall time of a phase while enabled"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter_ns()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record_time(name, time.perf_counter_ns() - start)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        """Snapshot of all metrics as plain dicts"""
+        gauges = dict(self.gauges)
+        for name, func in self.watched.items():
+            gauges[name] = func()
+        return {
+            "enabled": self.enabled,
+            "counters": dict(self.counters),
+            "timers": {
+                name: {
+                    "calls": calls,
+                    "total_ns": total_ns,
+                    "max_ns": max_ns,
+                    "mean_ns": total_ns / calls,
+                }
+                for name, (calls, total_ns, max_ns) in self.timers.items()
+            },
+            "gauges": gauges,
+        }
+
+    def _metric_name(self, name, suffix=""):
+        return f"{self.prefix}_{name.replace('.', '_')}{suffix}"
+
+    def prometheus_text(self):
+        """Render the current snapshot in the Prometheus text exposition format"""
+        snapshot = self.stats()
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            metric = self._metric_name(name, "_total")
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, timer in sorted(snapshot["timers"].items()):
+            calls = self._metric_name(name, "_calls_total")
+            seconds = self._metric_name(name, "_seconds_total")
+            longest = self._metric_name(name, "_seconds_max")
+            lines += [
+                f"# TYPE {calls} counter", f"{calls} {timer['calls']}",
+                f"# TYPE {seconds} counter", f"{seconds} {timer['total_ns'] / 1e9:.9f}",
+                f"# TYPE {longest} gauge", f"{longest} {timer['max_ns'] / 1e9:.9f}",
+            ]
+        for name, value in sorted(snapshot["gauges"].items()):
+            metric = self._metric_name(name)
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write the Prometheus text dump to a local file, replacing it atomically"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+
+METRICS = Metrics()
+timed = METRICS.timed